@@ -0,0 +1,119 @@
+"""
+Benchmark of the Dash renderers. Every renderer is measured in a fresh
+process for its startup time, peak resident memory and the cost of a
+refresh frame: update_from_file on a changed json file followed by the
+redraw. A display is needed, e.g. run under xvfb-run on headless kiosks.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RENDERERS = ("ttk", "canvas")
+
+
+def measure(renderer, source, frames):
+    """Measure one renderer in this process and return the results."""
+    # Imported here so that the parent process does not load Tk
+    import ttkbootstrap as ttk
+    from dash import Dash
+    from producer import ChargerSimulator, DEFAULT_SCRIPT, write_atomic
+
+    directory = tempfile.mkdtemp()
+    json_file = os.path.join(directory, "memory.json")
+    shutil.copyfile(source, json_file)
+
+    begin = time.perf_counter()
+    app = ttk.Window(title="Benchmark", size=(600, 850))
+    dash = Dash(app, json_file, 3600000, "WARNING", renderer=renderer)
+    app.update()
+    startup = time.perf_counter() - begin
+    dash.after_cancel(dash.update_job)
+
+    with open(json_file, "r", encoding="utf-8") as json_fp:
+        simulator = ChargerSimulator(json.load(json_fp), DEFAULT_SCRIPT, seed=1)
+
+    costs = []
+    for frame in range(frames):
+        state = simulator.step(frame * 0.5, 0.5)
+        write_atomic(json_file, json.dumps(state, indent=4) + "\n")
+        begin = time.perf_counter()
+        dash.update_from_file()
+        app.update_idletasks()
+        costs.append(time.perf_counter() - begin)
+
+    app.destroy()
+    shutil.rmtree(directory)
+    costs.sort()
+    results = {"renderer": renderer, "startup_ms": startup * 1000}
+    # With --frames 0 only the startup and the memory are measured
+    if costs:
+        results["frame_mean_ms"] = statistics.fmean(costs) * 1000
+        results["frame_p50_ms"] = costs[len(costs) // 2] * 1000
+        results["frame_p95_ms"] = costs[int(len(costs) * 0.95)] * 1000
+    # Kilobytes on Linux
+    results["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+
+def main():
+    """Run every renderer in a subprocess and print a comparison."""
+    arg_parser = argparse.ArgumentParser(
+        prog="Renderer Benchmark",
+        description="Compare startup, frame cost and memory of the renderers",
+    )
+    arg_parser.add_argument(
+        "-s", "--source", default="./memory.json", help="Json file to start from"
+    )
+    arg_parser.add_argument(
+        "-n", "--frames", default=500, type=int, help="Refresh frames to measure"
+    )
+    arg_parser.add_argument("--child", choices=RENDERERS, help=argparse.SUPPRESS)
+    arguments = arg_parser.parse_args()
+
+    if arguments.child:
+        print(json.dumps(measure(arguments.child, arguments.source, arguments.frames)))
+        return
+
+    results = []
+    for renderer in RENDERERS:
+        child = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                renderer,
+                "--source",
+                arguments.source,
+                "--frames",
+                str(arguments.frames),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode != 0:
+            # Most often there is no display, or the assets are missing
+            sys.stderr.write(child.stderr)
+            sys.exit(f"Benchmark of the {renderer} renderer failed.")
+        results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    columns = list(results[0])
+    print("".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print(
+            "".join(
+                f"{value:>15.2f}" if isinstance(value, float) else f"{value:>15}"
+                for value in result.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
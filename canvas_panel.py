@@ -0,0 +1,146 @@
+"""
+A read-only panel drawn on a single Canvas. It replaces the nested
+Frames, Labels and Progressbars of the default layout with canvas
+items whose text and coordinates are updated in place, which is
+cheaper to build and to redraw on low power displays.
+"""
+
+import tkinter
+import ttkbootstrap as ttk
+
+
+class CanvasPanel(tkinter.Canvas):
+    """
+    Canvas that lays out key/value rows, a banner and bars from top to
+    bottom. Items follow the Vars they are bound to through write
+    traces, and an item is only reconfigured when its value changed.
+    Interactive widgets can be embedded next to a bar as canvas windows.
+    """
+
+    def __init__(self, master, width=580, row_height=44, **kwargs):
+        self.colors = ttk.Style().colors
+        super().__init__(
+            master,
+            width=width,
+            height=0,
+            background=self.colors.bg,
+            highlightthickness=0,
+            **kwargs,
+        )
+        self.panel_width = width
+        self.row_height = row_height
+        self.cursor = 0
+        self.font = ("Noto Sans", 15)
+
+    def add_row(self, fields):
+        """Add a row of (key text, Var) pairs sharing the panel width."""
+        column_width = self.panel_width / len(fields)
+        y = self.cursor + self.row_height / 2
+        for index, (text, variable) in enumerate(fields):
+            x = index * column_width + 15
+            self.create_text(
+                x, y, text=text, anchor="w", font=self.font, fill=self.colors.primary
+            )
+            value = self.create_text(
+                x + 180, y, text="", anchor="w", font=self.font, fill=self.colors.fg
+            )
+            self._bind(variable, self._text_updater(value, variable))
+        self.cursor += self.row_height
+
+    def add_banner(self, text, variable, image=None):
+        """Add a banner that is shown only while variable is 1."""
+        top = self.cursor + 8
+        bottom = self.cursor + self.row_height + 8
+        tag = f"banner{top}"
+        self.create_rectangle(
+            15,
+            top,
+            self.panel_width - 15,
+            bottom,
+            fill=self.colors.danger,
+            outline="",
+            tags=tag,
+        )
+        self.create_text(
+            self.panel_width / 2,
+            (top + bottom) / 2,
+            text=text,
+            font=self.font,
+            fill=self.colors.selectfg,
+            tags=tag,
+        )
+        if image is not None:
+            self.create_image(
+                self.panel_width / 2 + 90, (top + bottom) / 2, image=image, tags=tag
+            )
+
+        shown = [None]
+
+        def update(*args):
+            visible = _get(variable) == 1
+            if visible != shown[0]:
+                shown[0] = visible
+                self.itemconfigure(tag, state="normal" if visible else "hidden")
+
+        self._bind(variable, update)
+        self.cursor = bottom + 8
+
+    def add_bar(self, text, variable, maximum, widget=None):
+        """Add a labelled bar filled in proportion to variable/maximum.
+        An optional widget, e.g. an EditableLabel created with this
+        panel as master, is embedded between the label and the bar.
+        """
+        y = self.cursor + self.row_height / 2
+        self.create_text(
+            10, y, text=text, anchor="w", font=self.font, fill=self.colors.primary
+        )
+        if widget is not None:
+            self.create_window(165, y, window=widget, anchor="w", width=60)
+        left, right = 240, self.panel_width - 10
+        top, bottom = y - 5, y + 5
+        self.create_rectangle(
+            left, top, right, bottom, fill=self.colors.inputbg, outline=""
+        )
+        bar = self.create_rectangle(
+            left, top, left, bottom, fill=self.colors.primary, outline=""
+        )
+
+        drawn = [None]
+
+        def update(*args):
+            value = _get(variable)
+            if not isinstance(value, (int, float)):
+                return
+            end = round(left + (right - left) * min(max(value / maximum, 0), 1))
+            if end != drawn[0]:
+                drawn[0] = end
+                self.coords(bar, left, top, end, bottom)
+
+        self._bind(variable, update)
+        self.cursor += self.row_height
+
+    def finish(self):
+        """Size the canvas to the items added so far."""
+        self.configure(height=self.cursor)
+
+    def _text_updater(self, item, variable):
+        drawn = [None]
+
+        def update(*args):
+            value = _get(variable)
+            if value is not None and value != drawn[0]:
+                drawn[0] = value
+                self.itemconfigure(item, text=value)
+
+        return update
+
+    def _bind(self, variable, update):
+        variable.trace_add("write", update)
+        update()
+
+
+def _get(variable):
+    try:
+        return variable.get()
+    except tkinter.TclError:
+        return None
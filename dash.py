@@ -1,22 +1,63 @@
 import json
 import logging
+import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+import time
 from pathlib import Path
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import BOTH, YES, TOP, BOTTOM, LEFT, RIGHT, X
 import pyperclip
+from canvas_panel import CanvasPanel
 from editable_label import EditableLabel
+from freshness import STAGES as FRESHNESS_STAGES, FreshnessTracker, file_signature
+from profiler import SamplingProfiler
+from sessions import SessionDetector, SessionStore
+from stats import StatsEngine
 
 
 PATH = Path(__file__).parent / "assets"
 
+# Numeric fields of the json file for which running statistics are kept
+STAT_FIELDS = (
+    "Voltage",
+    "Current",
+    "Active_Power",
+    "Frequency",
+    "Power_factor",
+    "Temperature",
+    "offered_current",
+    "meter_reading",
+)
+
+# Editable labels and the json key each of them is written to
+EDITABLE_FIELDS = {
+    "voltage": "Voltage",
+    "current": "Current",
+    "frequency": "Frequency",
+    "temperature": "Temperature",
+}
+
 
 class Dash(ttk.Frame):
     """
     All the UI elements are embedded in the Dash Class.
     """
 
-    def __init__(self, master, json_file, refresh_rate, loglevel):
+    def __init__(
+        self,
+        master,
+        json_file,
+        refresh_rate,
+        loglevel,
+        profile_seconds=0,
+        profile_dir=".",
+        sessions_db=None,
+        renderer="ttk",
+        stale_after=5.0,
+    ):
         super().__init__(master, padding=(5, 5))
         self.pack(fill=BOTH, expand=YES)
 
@@ -26,9 +67,42 @@ class Dash(ttk.Frame):
             format="[%(levelname)s][%(funcName)s() ] %(message)s",
             level=loglevel,
         )
-        self.update_state = {"Editing": "", "Commit": ""}
+        # Transaction and Staged hold a multi-field edit session. Edits
+        # made while a transaction is open are staged and written together.
+        self.update_state = {
+            "Editing": "",
+            "Commit": "",
+            "Transaction": False,
+            "Staged": {},
+        }
+        self.file_state = {}
+        self.torn_reads = 0
         self.json_file = json_file
         self.refresh_rate = refresh_rate
+        self.statistics = StatsEngine(STAT_FIELDS)
+        self.statistics_window = None
+        self.statistics_text = ttk.StringVar()
+        self.freshness = FreshnessTracker(stale_after)
+
+        # Sampling profiler, started by --profile-seconds or Ctrl+P
+        self.profiler = SamplingProfiler(output_dir=profile_dir)
+        self.profile_seconds = profile_seconds or 10
+        if profile_seconds > 0:
+            self.profiler.start(profile_seconds)
+        self.bind_all("<Control-p>", self.on_profile)
+
+        # Charging sessions derived from the state stream
+        self.session_detector = SessionDetector()
+        self.session_store = None
+        if sessions_db:
+            try:
+                self.session_store = SessionStore(sessions_db)
+            except sqlite3.Error as error:
+                self.logger.error(
+                    "Not recording sessions, cannot open %s: %s", sessions_db, error
+                )
+        # Closing the window must also close the open session and the store
+        master.protocol("WM_DELETE_WINDOW", self.on_exit)
 
         self.images = [
             ttk.PhotoImage(name="warning_icon", file=PATH / "warning_icon_32x32.png")
@@ -54,13 +128,145 @@ class Dash(ttk.Frame):
             master=header_container,
             font=("Noto Sans", 13),
             text="Online",
-            width=12,
+            width=16,
             bootstyle="primary",
         )
         self.network_state_label.pack(side=LEFT, fill=X, padx=15, pady=5)
 
+        # Producer write to paint latency of the displayed data
+        self.freshness_label = ttk.Label(
+            master=header_container,
+            font=("Noto Sans", 13),
+            text="",
+            width=14,
+            bootstyle="secondary",
+        )
+        self.freshness_label.pack(side=LEFT, fill=X, padx=15, pady=5)
+
         ttk.Separator(master=self, bootstyle="primary").pack(fill=X, pady=10)
 
+        # State variables shared by the renderers
+        self.status_evse = ttk.StringVar()
+        self.reservation_id = ttk.IntVar()
+        self.active_power = ttk.IntVar()
+        self.power_factor = ttk.IntVar()
+        self.offered_current = ttk.DoubleVar()
+        self.meter_reading = ttk.IntVar()
+        self.id_tag = ttk.StringVar()
+        self.powerloss = ttk.IntVar()
+        self.voltage = ttk.IntVar()
+        self.current = ttk.IntVar()
+        self.frequency = ttk.IntVar()
+        self.temperature = ttk.IntVar()
+        self.editable_variables = {
+            "voltage": self.voltage,
+            "current": self.current,
+            "frequency": self.frequency,
+            "temperature": self.temperature,
+        }
+
+        # The read-only panel and the metric bars are built from ttk
+        # widgets, or drawn on a single canvas for low power displays.
+        self.powerloss_container = None
+        if renderer == "canvas":
+            self.build_canvas_panel(loglevel)
+        else:
+            self.build_ro_panel()
+            self.build_slider_panel(loglevel)
+
+        # RW Container here contains some user input widgets
+        rw_border_container = ttk.Frame(master=self, bootstyle="info")
+        rw_border_container.pack(side=TOP, padx=(5, 5), fill=X, expand=YES)
+        rw_container = ttk.Frame(master=rw_border_container)
+        rw_container.pack(side=TOP, padx=1, pady=1, fill=BOTH, expand=YES)
+
+        rw_coupled_container = ttk.Frame(master=rw_container)
+        rw_coupled_container.pack(side=TOP, fill=X, pady=10, expand=YES)
+
+        # A toggle to switch the connection state
+        self.gun_connection_toggle_state = False
+
+        gun_connected_container = ttk.Frame(master=rw_coupled_container)
+        gun_connected_container.pack(side=LEFT, fill=X, expand=YES)
+        self.gun_connected = ttk.IntVar()
+        self.gun_connection_toggle = ttk.Button(
+            master=gun_connected_container,
+            command=self.gun_connection_toggled,
+            text="Connect Gun",
+            style="primary",
+        )
+        self.gun_connection_toggle.pack(side=LEFT, fill=X, padx=10, pady=10, expand=YES)
+
+        # Authorize Button
+        self.authorization_state = False
+
+        self.send_or_stop = ttk.IntVar()
+        send_or_stop_container = ttk.Frame(master=rw_coupled_container)
+        send_or_stop_container.pack(side=RIGHT, fill=X, expand=YES)
+        self.send_or_stop_button = ttk.Button(
+            master=send_or_stop_container,
+            text="Authorize",
+            command=self.authorize,
+            bootstyle="primary",
+        )
+        self.send_or_stop_button.pack(side=LEFT, fill=X, padx=10, pady=10, expand=YES)
+
+        # Emergency Stop: a button
+        self.estop_state = False
+
+        self.estop = ttk.IntVar()
+        estop_container = ttk.Frame(master=rw_container)
+        estop_container.pack(side=RIGHT, fill=X, expand=YES)
+        dash_style.configure(
+            "estop.TButton",
+            background=dash_style.colors.warning,
+            foreground="black",
+            font=("Noto Sans", 19),
+        )
+        self.estop_button = ttk.Button(
+            master=estop_container,
+            text="Emergency Stop",
+            command=self.on_estop,
+            style="estop.TButton",
+            width=40,
+        )
+        self.estop_button.pack(side=BOTTOM, padx=5, pady=5)
+        # RW End
+
+        self.update_from_file()
+        # Initialize authorize button
+        if self.send_or_stop.get() == 0:
+            self.authorization_state = False
+            self.send_or_stop_button.configure(text="Authorize")
+            self.send_or_stop_button.configure(bootstyle="primary")
+        elif self.send_or_stop.get() == 1:
+            self.authorization_state = True
+            self.send_or_stop_button.configure(text="De-Authorize")
+            self.send_or_stop_button.configure(bootstyle="success")
+
+        # Initialize gun connection button
+        if self.gun_connected.get() == 0:
+            self.gun_connection_toggle_state = False
+            self.gun_connection_toggle.configure(text="Connect Gun")
+        elif self.gun_connected.get() == 1:
+            self.gun_connection_toggle_state = True
+            self.gun_connection_toggle.configure(text="Disconnect Gun")
+
+        # Initialize emergency stop button
+        if self.estop.get() == 0:
+            self.estop_state = False
+            self.estop_button.configure(text="Emergency Stop")
+        elif self.estop.get() == 1:
+            self.estop_state = True
+            self.estop_button.configure(text="Release")
+
+        self.update_callback()
+        self.update_job = self.after(self.refresh_rate, self.update_callback)
+        ttk.Separator(master=self, bootstyle="primary").pack(fill=X, pady=15)
+        self.create_buttons()
+
+    def build_ro_panel(self):
+        """Build the read-only panel from ttk widgets"""
         # RO Container contains all the RO parameters which are passively monitored
         ro_border_container = ttk.Frame(master=self, bootstyle="dark")
         ro_border_container.pack(side=TOP, padx=(5, 5), fill=X, expand=YES)
@@ -97,7 +303,6 @@ class Dash(ttk.Frame):
         )
         status_evse_key_label.pack(**key_label_pack_params)
 
-        self.status_evse = ttk.StringVar()
         status_evse_value_label = ttk.Label(
             master=status_evse_container,
             textvariable=self.status_evse,
@@ -114,7 +319,6 @@ class Dash(ttk.Frame):
         )
         reservation_id_key_label.pack(**key_label_pack_params)
 
-        self.reservation_id = ttk.IntVar()
         reservation_id_value_label = ttk.Label(
             master=reservation_id_container,
             textvariable=self.reservation_id,
@@ -138,7 +342,6 @@ class Dash(ttk.Frame):
         )
         active_power_key_label.pack(**key_label_pack_params)
 
-        self.active_power = ttk.IntVar()
         active_power_value_label = ttk.Label(
             master=active_power_container,
             textvariable=self.active_power,
@@ -155,7 +358,6 @@ class Dash(ttk.Frame):
         )
         power_factor_key_label.pack(**key_label_pack_params)
 
-        self.power_factor = ttk.IntVar()
         power_factor_value_label = ttk.Label(
             master=power_factor_container,
             textvariable=self.power_factor,
@@ -178,7 +380,6 @@ class Dash(ttk.Frame):
         )
         offered_current_key_label.pack(**key_label_pack_params)
 
-        self.offered_current = ttk.DoubleVar()
         offered_current_value_label = ttk.Label(
             master=offered_current_container,
             textvariable=self.offered_current,
@@ -195,7 +396,6 @@ class Dash(ttk.Frame):
         )
         meter_reading_key_label.pack(**key_label_pack_params)
 
-        self.meter_reading = ttk.IntVar()
         meter_reading_value_label = ttk.Label(
             master=meter_reading_container,
             textvariable=self.meter_reading,
@@ -213,14 +413,12 @@ class Dash(ttk.Frame):
         )
         id_tag_key_label.pack(**key_label_pack_params)
 
-        self.id_tag = ttk.StringVar()
         id_tag_value_label = ttk.Label(
             master=id_tag_container, textvariable=self.id_tag
         )
         id_tag_value_label.pack(**value_label_pack_params)
 
         # This should be a visual indicator for powerloss occurence
-        self.powerloss = ttk.IntVar()
         self.powerloss_container = ttk.Frame(master=ro_container)
         self.powerloss_container.pack(**ro_child_container_pack_params)
 
@@ -240,6 +438,8 @@ class Dash(ttk.Frame):
         powerloss_label.pack(side=TOP, fill=BOTH, expand=YES, padx=(200, 200), pady=10)
         # RO END
 
+    def build_slider_panel(self, loglevel):
+        """Build the metric rows with editable values and progress bars"""
         # Slider Container
         slider_border_container = ttk.Frame(master=self, bootstyle="dark")
         slider_border_container.pack(side=TOP, padx=(5, 5), fill=BOTH, expand=YES)
@@ -247,7 +447,6 @@ class Dash(ttk.Frame):
         slider_container.pack(side=TOP, padx=1, pady=1, fill=BOTH, expand=YES)
 
         # Voltage
-        self.voltage = ttk.IntVar()
         voltage_container = ttk.Frame(master=slider_container)
         voltage_container.pack(side=TOP, fill=X, expand=YES)
         voltage_label = ttk.Label(
@@ -274,7 +473,6 @@ class Dash(ttk.Frame):
         voltage_scale.pack(side=RIGHT, padx=5, pady=15, fill=X, expand=YES)
 
         # current
-        self.current = ttk.IntVar()
         current_container = ttk.Frame(master=slider_container)
         current_container.pack(side=TOP, fill=X, expand=YES)
         current_label = ttk.Label(
@@ -299,7 +497,6 @@ class Dash(ttk.Frame):
         current_scale.pack(side=TOP, fill=X, padx=5, pady=15, expand=YES)
 
         # Frequency
-        self.frequency = ttk.IntVar()
         frequency_container = ttk.Frame(master=slider_container)
         frequency_container.pack(side=TOP, fill=X, expand=YES)
         frequency_label = ttk.Label(
@@ -324,7 +521,6 @@ class Dash(ttk.Frame):
         frequency_scale.pack(side=TOP, fill=X, padx=5, pady=15, expand=YES)
 
         # temperature
-        self.temperature = ttk.IntVar()
         temperature_container = ttk.Frame(master=slider_container)
         temperature_container.pack(side=TOP, fill=X, expand=YES)
         temperature_label = ttk.Label(
@@ -349,96 +545,94 @@ class Dash(ttk.Frame):
         )
         temperature_scale.pack(side=TOP, fill=X, padx=5, pady=15, expand=YES)
 
-        # RW Container here contains some user input widgets
-        rw_border_container = ttk.Frame(master=self, bootstyle="info")
-        rw_border_container.pack(side=TOP, padx=(5, 5), fill=X, expand=YES)
-        rw_container = ttk.Frame(master=rw_border_container)
-        rw_container.pack(side=TOP, padx=1, pady=1, fill=BOTH, expand=YES)
+        self.build_transaction_controls(slider_container)
 
-        rw_coupled_container = ttk.Frame(master=rw_container)
-        rw_coupled_container.pack(side=TOP, fill=X, pady=10, expand=YES)
-
-        # A toggle to switch the connection state
-        self.gun_connection_toggle_state = False
+    def build_canvas_panel(self, loglevel):
+        """Draw the read-only panel and the metric bars on a single canvas.
+        The editable values stay EditableLabel widgets embedded in it.
+        """
+        panel_border_container = ttk.Frame(master=self, bootstyle="dark")
+        panel_border_container.pack(side=TOP, padx=(5, 5), fill=X, expand=YES)
+        panel = CanvasPanel(master=panel_border_container)
+        panel.pack(side=TOP, padx=1, pady=1, fill=BOTH, expand=YES)
 
-        gun_connected_container = ttk.Frame(master=rw_coupled_container)
-        gun_connected_container.pack(side=LEFT, fill=X, expand=YES)
-        self.gun_connected = ttk.IntVar()
-        self.gun_connection_toggle = ttk.Button(
-            master=gun_connected_container,
-            command=self.gun_connection_toggled,
-            text="Connect Gun",
-            style="primary",
+        panel.add_row(
+            [("EVSE Status", self.status_evse), ("Reservation ID", self.reservation_id)]
         )
-        self.gun_connection_toggle.pack(side=LEFT, fill=X, padx=10, pady=10, expand=YES)
-
-        # Authorize Button
-        self.authorization_state = False
-
-        self.send_or_stop = ttk.IntVar()
-        send_or_stop_container = ttk.Frame(master=rw_coupled_container)
-        send_or_stop_container.pack(side=RIGHT, fill=X, expand=YES)
-        self.send_or_stop_button = ttk.Button(
-            master=send_or_stop_container,
-            text="Authorize",
-            command=self.authorize,
+        panel.add_row(
+            [("Active Power", self.active_power), ("Power Factor", self.power_factor)]
+        )
+        panel.add_row(
+            [
+                ("Offered Current", self.offered_current),
+                ("Meter Reading", self.meter_reading),
+            ]
+        )
+        panel.add_row([("ID Tag", self.id_tag)])
+        panel.add_banner("Power Loss", self.powerloss, image="warning_icon")
+
+        for text, label_name, maximum in (
+            ("Voltage", "voltage", 240),
+            ("Current", "current", 25),
+            ("Frequency", "frequency", 60),
+            ("Temperature", "temperature", 50),
+        ):
+            variable = self.editable_variables[label_name]
+            value_label = EditableLabel(
+                master=panel,
+                exposevariable=variable,
+                update_state=self.update_state,
+                label_name=label_name,
+                loglevel=loglevel,
+                width=5,
+            )
+            panel.add_bar(text, variable, maximum, widget=value_label)
+        panel.finish()
+
+        transaction_border_container = ttk.Frame(master=self, bootstyle="dark")
+        transaction_border_container.pack(side=TOP, padx=(5, 5), fill=X, expand=YES)
+        transaction_container = ttk.Frame(master=transaction_border_container)
+        transaction_container.pack(side=TOP, padx=1, pady=1, fill=BOTH, expand=YES)
+        self.build_transaction_controls(transaction_container)
+
+    def build_transaction_controls(self, master):
+        """Build the batch edit row in master"""
+        # Batch edit: stage edits to several fields and write them at once
+        transaction_container = ttk.Frame(master=master)
+        transaction_container.pack(side=TOP, fill=X, expand=YES, pady=(0, 10))
+        self.transaction_state_label = ttk.Label(
+            master=transaction_container,
+            text="Batch Edit",
+            width=13,
             bootstyle="primary",
         )
-        self.send_or_stop_button.pack(side=LEFT, fill=X, padx=10, pady=10, expand=YES)
-
-        # Emergency Stop: a button
-        self.estop_state = False
-
-        self.estop = ttk.IntVar()
-        estop_container = ttk.Frame(master=rw_container)
-        estop_container.pack(side=RIGHT, fill=X, expand=YES)
-        dash_style.configure(
-            "estop.TButton",
-            background=dash_style.colors.warning,
-            foreground="black",
-            font=("Noto Sans", 19),
+        self.transaction_state_label.pack(side=LEFT, fill=X, padx=(5, 5))
+        self.transaction_button = ttk.Button(
+            master=transaction_container,
+            text="Begin",
+            command=self.begin_transaction,
+            bootstyle="primary",
+            width=8,
         )
-        self.estop_button = ttk.Button(
-            master=estop_container,
-            text="Emergency Stop",
-            command=self.on_estop,
-            style="estop.TButton",
-            width=40,
+        self.transaction_button.pack(side=LEFT, padx=5)
+        self.transaction_commit_button = ttk.Button(
+            master=transaction_container,
+            text="Commit",
+            command=self.commit_transaction,
+            bootstyle="success",
+            state="disabled",
+            width=8,
         )
-        self.estop_button.pack(side=BOTTOM, padx=5, pady=5)
-        # RW End
-
-        self.update_from_file()
-        # Initialize authorize button
-        if self.send_or_stop.get() == 0:
-            self.authorization_state = False
-            self.send_or_stop_button.configure(text="Authorize")
-            self.send_or_stop_button.configure(bootstyle="primary")
-        elif self.send_or_stop.get() == 1:
-            self.authorization_state = True
-            self.send_or_stop_button.configure(text="De-Authorize")
-            self.send_or_stop_button.configure(bootstyle="success")
-
-        # Initialize gun connection button
-        if self.gun_connected.get() == 0:
-            self.gun_connection_toggle_state = False
-            self.gun_connection_toggle.configure(text="Connect Gun")
-        elif self.gun_connected.get() == 1:
-            self.gun_connection_toggle_state = True
-            self.gun_connection_toggle.configure(text="Disconnect Gun")
-
-        # Initialize emergency stop button
-        if self.estop.get() == 0:
-            self.estop_state = False
-            self.estop_button.configure(text="Emergency Stop")
-        elif self.estop.get() == 1:
-            self.estop_state = True
-            self.estop_button.configure(text="Release")
-
-        self.update_callback()
-        self.update_job = self.after(self.refresh_rate, self.update_callback)
-        ttk.Separator(master=self, bootstyle="primary").pack(fill=X, pady=15)
-        self.create_buttons()
+        self.transaction_commit_button.pack(side=LEFT, padx=5)
+        self.transaction_rollback_button = ttk.Button(
+            master=transaction_container,
+            text="Rollback",
+            command=self.rollback_transaction,
+            bootstyle="danger",
+            state="disabled",
+            width=8,
+        )
+        self.transaction_rollback_button.pack(side=LEFT, padx=5)
 
     def create_buttons(self):
         """A method to setup the buttons at the bottom"""
@@ -456,6 +650,16 @@ class Dash(ttk.Frame):
         copy_button.pack(side=RIGHT, padx=5)
         copy_button.focus_set()
 
+        # Opens a window with the running statistics of the numeric fields
+        statistics_button = ttk.Button(
+            master=button_container,
+            text="Statistics",
+            command=self.on_statistics,
+            bootstyle="primary",
+            width=11,
+        )
+        statistics_button.pack(side=RIGHT, padx=5)
+
         # Exits the program
         exit_button = ttk.Button(
             master=button_container,
@@ -525,8 +729,8 @@ class Dash(ttk.Frame):
                 self.update_state["Editing"] = "gun_connection_toggled"
                 self.update_state["Commit"] = "gun_connection_toggled"
 
-    def on_copy(self):
-        """Callback for copy button"""
+    def collect_state(self):
+        """Gather the current GUI state in the layout of the json file"""
         data = {}
         data["status_evse"] = self.status_evse.get()
         data["Gun_connected"] = self.gun_connected.get()
@@ -544,52 +748,202 @@ class Dash(ttk.Frame):
         data["Temperature"] = self.temperature.get()
         data["offered_current"] = self.offered_current.get()
         data["meter_reading"] = self.meter_reading.get()
+        return data
+
+    def on_copy(self):
+        """Callback for copy button. The running statistics are appended
+        to the copied json under the "statistics" key.
+        """
+        data = self.collect_state()
+        data["statistics"] = self.statistics.snapshot()
+        data["freshness"] = self.freshness.snapshot()
         pyperclip.copy(json.dumps(data, indent=4))
 
+    def on_statistics(self):
+        """Callback for statistics button. Opens a window listing the
+        running statistics, or raises it if it is already open.
+        """
+        if self.statistics_window is not None:
+            self.statistics_window.lift()
+            return
+        self.statistics_window = ttk.Toplevel(
+            title="Statistics", resizable=(False, False)
+        )
+        self.statistics_window.protocol("WM_DELETE_WINDOW", self.on_statistics_close)
+        ttk.Label(
+            master=self.statistics_window,
+            textvariable=self.statistics_text,
+            font=("Noto Sans Mono", 11),
+            justify=LEFT,
+        ).pack(side=TOP, fill=BOTH, expand=YES, padx=15, pady=15)
+        self.refresh_statistics()
+
+    def on_statistics_close(self):
+        """Destroy the statistics window"""
+        self.statistics_window.destroy()
+        self.statistics_window = None
+
+    def refresh_statistics(self):
+        """Format the running statistics into the statistics window"""
+        snapshot = self.statistics.snapshot()
+        lines = [
+            f"{'Field':<16}{'EWMA':>10}{'Min':>10}{'Max':>10}{'p50':>10}{'p95':>10}"
+        ]
+        for field in STAT_FIELDS:
+            metric = snapshot[field]
+            lines.append(
+                f"{field:<16}"
+                + "".join(
+                    f"{_format_stat(metric[key]):>10}"
+                    for key in ("ewma", "min", "max", "p50", "p95")
+                )
+            )
+        lines.append("")
+        lines.append(
+            f"Charge rate: {_format_stat(snapshot['charge_rate_per_hour'])} per hour"
+        )
+        lines.append(f"Unreadable reads skipped: {self.torn_reads}")
+
+        freshness = self.freshness.snapshot()
+        lines.append("")
+        lines.append(
+            f"{'Latency (ms)':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'Max':>10}"
+        )
+        for stage in FRESHNESS_STAGES:
+            histogram = freshness[stage]
+            lines.append(
+                f"{stage:<16}"
+                + "".join(
+                    f"{_format_stat(histogram[key]):>10}"
+                    for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+                )
+            )
+        lines.append(f"Skipped sequence numbers: {freshness['skipped_sequences']}")
+        self.statistics_text.set("\n".join(lines))
+
+    def begin_transaction(self):
+        """Callback for batch edit begin button. Edits made from here on
+        are staged until the transaction is committed or rolled back.
+        """
+        self.update_state["Transaction"] = True
+        self.update_state["Staged"] = {}
+        self.transaction_button.configure(state="disabled")
+        self.transaction_commit_button.configure(state="normal")
+        self.transaction_rollback_button.configure(state="normal")
+        self.transaction_state_label.configure(text="0 staged", bootstyle="warning")
+        self.logger.info("Transaction begun.")
+
+    def commit_transaction(self):
+        """Callback for batch edit commit button. All staged edits are
+        written to the json file in a single save.
+        """
+        staged = self.update_state["Staged"]
+        self.end_transaction()
+        if not staged:
+            self.logger.info("Transaction committed with nothing staged.")
+            return
+        for label_name, value in staged.items():
+            self.editable_variables[label_name].set(value)
+        self.update_state["Editing"] = "transaction"
+        self.update_state["Commit"] = "transaction"
+        self.logger.info("Transaction of %s awaiting commit.", ", ".join(staged))
+
+    def rollback_transaction(self):
+        """Callback for batch edit rollback button. Staged edits are
+        dropped and the GUI is restored from the json file.
+        """
+        self.end_transaction()
+        self.logger.info("Transaction rolled back.")
+        # An open entry keeps its value until the edit session ends,
+        # after which update_callback refreshes from the file.
+        if not self.update_state["Editing"]:
+            self.update_from_file()
+
+    def end_transaction(self):
+        """Close the transaction and reset the batch edit controls"""
+        self.update_state["Transaction"] = False
+        self.update_state["Staged"] = {}
+        self.transaction_button.configure(state="normal")
+        self.transaction_commit_button.configure(state="disabled")
+        self.transaction_rollback_button.configure(state="disabled")
+        self.transaction_state_label.configure(text="Batch Edit", bootstyle="primary")
+
     def on_save(self):
         """Main method used to update the json file contents
-        based on changes in the GUI
+        based on changes in the GUI. The file is replaced atomically
+        so that readers never observe a partially written file.
         """
-        data = {}
-        data["status_evse"] = self.status_evse.get()
-        data["Gun_connected"] = self.gun_connected.get()
-        data["send_or_stop"] = self.send_or_stop.get()
-        data["Network"] = self.network.get()
-        data["Reservation_id"] = self.reservation_id.get()
-        data["Estop"] = self.estop.get()
-        data["Powerloss"] = self.powerloss.get()
-        data["Idtag"] = self.id_tag.get()
-        data["Voltage"] = self.voltage.get()
-        data["Current"] = self.current.get()
-        data["Active_Power"] = self.active_power.get()
-        data["Frequency"] = self.frequency.get()
-        data["Power_factor"] = self.power_factor.get()
-        data["Temperature"] = self.temperature.get()
-        data["offered_current"] = self.offered_current.get()
-        data["meter_reading"] = self.meter_reading.get()
-
-        with open(self.json_file, "w", encoding="utf-8") as json_file_write:
-            self.logger.info("Commiting to file: %s", json.dumps(data, indent=4))
-            json.dump(data, json_file_write, indent=4)
-            json_file_write.write("\n")
+        data = self.collect_state()
+
+        # Writes from other controls during an open transaction must not
+        # leak the staged values, so those fields keep their file values.
+        if self.update_state["Transaction"]:
+            for label_name in self.update_state["Staged"]:
+                key = EDITABLE_FIELDS[label_name]
+                if key in self.file_state:
+                    data[key] = self.file_state[key]
+
+        self.logger.info("Commiting to file: %s", json.dumps(data, indent=4))
+        directory = os.path.dirname(os.path.abspath(self.json_file))
+        json_file_write = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        )
+        try:
+            with json_file_write:
+                json.dump(data, json_file_write, indent=4)
+                json_file_write.write("\n")
+                json_file_write.flush()
+                os.fsync(json_file_write.fileno())
+                saved = os.fstat(json_file_write.fileno())
+            try:
+                shutil.copymode(self.json_file, json_file_write.name)
+            except OSError:
+                pass
+            os.replace(json_file_write.name, self.json_file)
+        except BaseException:
+            os.unlink(json_file_write.name)
+            raise
+        # The monitor's own write is neither producer latency nor fresh data
+        self.freshness.accept(file_signature(saved))
+
+    def on_profile(self, event=None):
+        """Hotkey callback to start a profiler capture of the main loop"""
+        self.profiler.start(self.profile_seconds)
 
     def on_exit(self):
         """Exit the application."""
         self.logger.info("Exiting application.")
+        if self.session_store is not None:
+            session = self.session_detector.close(time.time(), "shutdown")
+            if session is not None:
+                self.session_store.add(session)
+            self.session_store.close()
         self.quit()
 
     def update_from_file(self):
-        """Main method to update GUI state from json file"""
+        """Main method to update GUI state from json file. A file that
+        does not decode, e.g. one read while a producer is rewriting it
+        in place, is skipped and the previous state is kept.
+        """
         with open(self.json_file, "r", encoding="utf-8") as json_fp:
-            data = json.load(json_fp)
+            # Identity of the version actually parsed, the path may have
+            # been replaced by a newer one in the meantime.
+            stat = os.fstat(json_fp.fileno())
+            changed = self.freshness.observe(file_signature(stat))
+            detected_wall = time.time()
+            detected_at = time.perf_counter()
+            try:
+                data = json.load(json_fp)
+            except ValueError as error:
+                self.torn_reads += 1
+                # Detect the change again once the write has completed
+                self.freshness.reject()
+                self.logger.warning("Skipping unreadable json file: %s", error)
+                return
+            parsed_at = time.perf_counter()
 
             self.network.set(data["Network"])
-            if data["Network"] == 0:
-                self.network_state_label.configure(text="Offline")
-                self.network_state_label.configure(bootstyle="danger")
-            elif data["Network"] == 1:
-                self.network_state_label.configure(text="Online")
-                self.network_state_label.configure(bootstyle="success")
+            self.refresh_network_label()
 
             self.status_evse.set(data["status_evse"])
             self.gun_connected.set(data["Gun_connected"])
@@ -601,7 +955,9 @@ class Dash(ttk.Frame):
 
             # Power Loss Indicator
             self.powerloss.set(data["Powerloss"])
-            if data["Powerloss"] == 0:
+            if self.powerloss_container is None:
+                pass
+            elif data["Powerloss"] == 0:
                 if self.powerloss_container.winfo_manager():
                     self.powerloss_container.pack_forget()
             elif data["Powerloss"] == 1:
@@ -615,6 +971,66 @@ class Dash(ttk.Frame):
             self.power_factor.set(data["Power_factor"])
             self.temperature.set(data["Temperature"])
 
+        self.file_state = data
+
+        session = self.session_detector.feed(data, time.time())
+        if session is not None and self.session_store is not None:
+            self.session_store.add(session)
+
+        # Keep showing the staged values of an open transaction
+        for label_name, value in self.update_state["Staged"].items():
+            self.editable_variables[label_name].set(value)
+        if self.update_state["Transaction"]:
+            self.transaction_state_label.configure(
+                text=f"{len(self.update_state['Staged'])} staged"
+            )
+
+        # Producers may stamp their writes with a Timestamp (seconds since
+        # the epoch) and a Sequence number. Otherwise the modification
+        # time of the file stands in for the write time.
+        if changed:
+            self.freshness.sequence_seen(data.get("Sequence"))
+        if changed and not self.freshness.baseline:
+            written_at = data.get("Timestamp")
+            if not isinstance(written_at, (int, float)):
+                written_at = stat.st_mtime_ns / 1e9
+            self.after_idle(
+                self.on_painted,
+                detected_wall - written_at,
+                parsed_at - detected_at,
+                parsed_at,
+            )
+
+        if changed:
+            self.statistics.update(data, time.monotonic())
+        if self.statistics_window is not None:
+            self.refresh_statistics()
+
+    def on_painted(self, write_to_detect, detect_to_parse, parsed_at):
+        """Idle callback queued after the widget updates of a change, so
+        it runs once they have been redrawn. Records the latencies.
+        """
+        self.freshness.record(
+            write_to_detect, detect_to_parse, time.perf_counter() - parsed_at
+        )
+        p95 = self.freshness.histograms["write_to_paint"].percentile(0.95)
+        self.freshness_label.configure(text=f"p95 {p95} ms")
+
+    def refresh_network_label(self):
+        """Show the network state in the header and flag it when the json
+        file has not changed for longer than the stale threshold.
+        """
+        if self.network.get() == 0:
+            text, bootstyle = "Offline", "danger"
+        else:
+            text, bootstyle = "Online", "success"
+        if self.freshness.stale():
+            age = self.freshness.age()
+            text += " (stale)" if age is None else f" ({age:.0f}s old)"
+            if bootstyle == "success":
+                bootstyle = "warning"
+        self.network_state_label.configure(text=text, bootstyle=bootstyle)
+
     def update_callback(self):
         """A wrapper around update_from_file which acts as the GUI periodical callback
         and manages the state of data edited in the GUI and data present
@@ -632,5 +1048,13 @@ class Dash(ttk.Frame):
         if not self.update_state["Editing"]:
             self.logger.debug("Refreshing GUI from file contents: %s", self.json_file)
             self.update_from_file()
+        else:
+            self.refresh_network_label()
 
         self.update_job = self.after(self.refresh_rate, self.update_callback)
+
+
+def _format_stat(value):
+    if value is None:
+        return "-"
+    return f"{value:.2f}"
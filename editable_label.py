@@ -59,20 +59,48 @@ class EditableLabel(ttk.Label):
         self.entry.place(
             relx=0.5, rely=0.5, relwidth=1.0, relheight=1.0, anchor="center"
         )
+        self.entry.configure(bootstyle="default")
         self.entry.delete(0, END)
         self.entry.insert(0, super().cget("text"))
         self.entry.focus_set()
         self.update_state["Editing"] = self.label_name
         self.logger.info("Edit session begun.")
 
+    def parse_entry(self):
+        """Convert the text in the Entry widget to the type of the
+        underlying Var. Raises ValueError if the text does not convert.
+        """
+        text = self.entry.get().strip()
+        if isinstance(self.expose_variable, ttk.IntVar):
+            return int(text)
+        if isinstance(self.expose_variable, ttk.DoubleVar):
+            return float(text)
+        return text
+
     def edit_save(self, event=None):
         """Save the edited text in the Entry widget to the underlying
         Var bound to the widget and forget the overlaid entry widget.
+        When a transaction is open the value is staged instead of
+        being committed on its own.
         """
+        try:
+            value = self.parse_entry()
+        except ValueError:
+            self.entry.configure(bootstyle="danger")
+            self.logger.warning(
+                "Rejected value %s for %s.", self.entry.get(), self.label_name
+            )
+            return
+        self.entry.configure(bootstyle="default")
         self.configure(text=self.entry.get())
-        self.expose_variable.set(self.entry.get())
-        self.update_state["Commit"] = self.label_name
-        self.logger.info("Value changed. Awaiting commit.")
+        self.expose_variable.set(value)
+        if self.update_state.get("Transaction"):
+            self.update_state["Staged"][self.label_name] = value
+            self.update_state["Editing"] = ""
+            self.logger.info("Value staged. Awaiting transaction commit.")
+        else:
+            self.update_state["Commit"] = self.label_name
+            self.logger.info("Value changed. Awaiting commit.")
         self.entry.place_forget()
 
     def edit_stop(self, event=None):
@@ -0,0 +1,166 @@
+"""
+Data freshness tracking: how old the values on screen are. Latencies
+from the producer write to the detection, parsing and painting of a
+change are kept in fixed bucket histograms, gaps in the optional
+producer sequence numbers are counted and the time since the file
+last changed is tracked for a stale data indicator.
+"""
+
+import bisect
+import time
+
+# Upper bounds of the histogram buckets in milliseconds
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+STAGES = ("write_to_detect", "detect_to_parse", "parse_to_paint", "write_to_paint")
+
+
+def file_signature(stat):
+    """Identity of a version of the file from its os.stat result."""
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies over fixed, roughly logarithmic buckets.
+    Percentiles are reported as the upper bound of their bucket.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.total = 0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """Record a latency given in seconds."""
+        milliseconds = seconds * 1000
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+        self.total += 1
+        self.maximum = max(self.maximum, milliseconds)
+
+    def percentile(self, quantile):
+        """Return the bucket bound in ms holding the quantile, None if empty.
+        Latencies beyond the last bucket report the maximum seen.
+        """
+        if not self.total:
+            return None
+        rank = quantile * self.total
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.maximum, 3)
+
+    def snapshot(self):
+        """Return the histogram as a json friendly dict."""
+        buckets = {
+            f"<={bound}ms": count for bound, count in zip(BUCKET_BOUNDS_MS, self.counts)
+        }
+        buckets[f">{BUCKET_BOUNDS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.maximum, 3),
+            "buckets": buckets,
+        }
+
+
+class FreshnessTracker:
+    """
+    Tracks changes of the monitored file, the latency of each stage
+    from producer write to paint and the producer sequence numbers.
+    """
+
+    def __init__(self, stale_after=5.0):
+        self.stale_after = stale_after
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.signature = None
+        self.last_change = None
+        self.changes = 0
+        # Signature and change time before the last observed change
+        self.previous = None
+        self.sequence = None
+        self.updates = 0
+        self.skipped = 0
+
+    def observe(self, signature, now=None):
+        """Compare the file signature, e.g. modification time and size,
+        with the previous one. Returns True when the file changed. The
+        first observation counts as a change but is only a baseline:
+        its age says nothing about the producer latency.
+        """
+        now = time.monotonic() if now is None else now
+        if signature == self.signature:
+            return False
+        self.previous = (self.signature, self.last_change)
+        self.signature = signature
+        self.last_change = now
+        self.changes += 1
+        return True
+
+    def reject(self):
+        """Undo the last observed change, for a version of the file that
+        could not be parsed, so that it is detected again once complete.
+        """
+        if self.previous is None:
+            return
+        self.signature, self.last_change = self.previous
+        self.previous = None
+        self.changes -= 1
+
+    @property
+    def baseline(self):
+        """True while only the first version of the file has been seen."""
+        return self.changes <= 1
+
+    def accept(self, signature):
+        """Take signature as the current version without counting it as
+        a change, for writes made by the monitor itself.
+        """
+        self.signature = signature
+
+    def sequence_seen(self, sequence):
+        """Count the sequence numbers skipped before this one. A lower
+        number than the last one is taken as a producer restart.
+        """
+        if not isinstance(sequence, int):
+            return
+        if self.sequence is not None and sequence > self.sequence + 1:
+            self.skipped += sequence - self.sequence - 1
+        self.sequence = sequence
+
+    def record(self, write_to_detect, detect_to_parse, parse_to_paint):
+        """Record the stage latencies of one update, in seconds."""
+        self.updates += 1
+        write_to_detect = max(0.0, write_to_detect)
+        self.histograms["write_to_detect"].add(write_to_detect)
+        self.histograms["detect_to_parse"].add(detect_to_parse)
+        self.histograms["parse_to_paint"].add(parse_to_paint)
+        self.histograms["write_to_paint"].add(
+            write_to_detect + detect_to_parse + parse_to_paint
+        )
+
+    def age(self, now=None):
+        """Seconds since the file last changed, None before any change."""
+        if self.last_change is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return now - self.last_change
+
+    def stale(self, now=None):
+        """True when the file has not changed for stale_after seconds."""
+        age = self.age(now)
+        return age is None or age >= self.stale_after
+
+    def snapshot(self):
+        """Return all the tracked figures as a json friendly dict."""
+        data = {
+            stage: histogram.snapshot() for stage, histogram in self.histograms.items()
+        }
+        data["updates"] = self.updates
+        data["skipped_sequences"] = self.skipped
+        data["age_s"] = None if self.age() is None else round(self.age(), 3)
+        return data
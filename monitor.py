@@ -40,6 +40,38 @@ arg_parser.add_argument("-l", "--length", default=850, help="GUI height")
 arg_parser.add_argument(
     "-t", "--theme", default="black", help="Pick a theme for the GUI"
 )
+arg_parser.add_argument(
+    "--profile-seconds",
+    default=0,
+    type=float,
+    help="Profile the main loop for N seconds from startup. "
+    "Ctrl+P starts a capture of the same length at any time (default 10)",
+)
+arg_parser.add_argument(
+    "--profile-dir",
+    default=".",
+    help="Directory to write profiler captures to",
+)
+
+arg_parser.add_argument(
+    "--renderer",
+    default="ttk",
+    choices=("ttk", "canvas"),
+    help="Draw the read-only panel and metric bars with ttk widgets or on a "
+    "single canvas, which is lighter on low power displays",
+)
+arg_parser.add_argument(
+    "--stale-after",
+    default=5.0,
+    type=float,
+    help="Seconds without a change of the source file after which the data "
+    "is flagged as stale",
+)
+arg_parser.add_argument(
+    "--sessions-db",
+    default="./sessions.db",
+    help="SQLite database to record charging sessions in, empty to disable",
+)
 
 arguments = arg_parser.parse_args()
 
@@ -55,6 +87,10 @@ else:
     logger.error("Unknown value %s passed for logging level", loglevel)
     sys.exit(1)
 
+if arguments.profile_seconds < 0:
+    logger.error("Profile duration %s is negative", arguments.profile_seconds)
+    sys.exit(1)
+
 json_file = arguments.source
 provided_path = Path(json_file)
 if not provided_path.is_file():
@@ -76,5 +112,15 @@ app = ttk.Window(
     title="Status Monitor", themename=THEME, size=(x, y), resizable=(False, False)
 )
 
-Dash(app, json_file, arguments.refresh, loglevel)
+Dash(
+    app,
+    json_file,
+    arguments.refresh,
+    loglevel,
+    profile_seconds=arguments.profile_seconds,
+    profile_dir=arguments.profile_dir,
+    sessions_db=arguments.sessions_db,
+    renderer=arguments.renderer,
+    stale_after=arguments.stale_after,
+)
 app.mainloop()
@@ -0,0 +1,330 @@
+"""
+Synthetic producer for the monitored json file. It stands in for the
+charger bridge and rewrites the file at a fixed rate with simulated
+measurements and scripted events, so that the monitor can be exercised
+and benchmarked under load.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Default scenario, repeated every "loop" seconds. status_evse follows
+# the IEC 61851 states: A unplugged, B plugged in, C charging.
+DEFAULT_SCRIPT = {
+    "loop": 120,
+    "events": [
+        {"at": 0, "set": {"status_evse": "A", "Gun_connected": 0, "send_or_stop": 0}},
+        {"at": 5, "set": {"status_evse": "B", "Gun_connected": 1}},
+        {"at": 10, "set": {"status_evse": "C", "send_or_stop": 1}},
+        {"at": 70, "set": {"Powerloss": 1}},
+        {"at": 72, "set": {"Powerloss": 0}},
+        {"at": 90, "set": {"status_evse": "B", "send_or_stop": 0}},
+        {"at": 100, "set": {"status_evse": "A", "Gun_connected": 0}},
+    ],
+}
+
+DEFAULT_STATE = {
+    "status_evse": "A",
+    "Gun_connected": 0,
+    "send_or_stop": 0,
+    "Network": 1,
+    "Reservation_id": 0,
+    "Estop": 0,
+    "Powerloss": 0,
+    "Idtag": "SSLAKY7LXAK3M2VX",
+    "Voltage": 230,
+    "Current": 0,
+    "Active_Power": 0,
+    "Frequency": 50,
+    "Power_factor": 0,
+    "Temperature": 25,
+    "offered_current": 32.0,
+    "meter_reading": 0,
+}
+
+# Fields the monitor GUI writes and that the producer may honour
+GUI_FIELDS = ("Estop", "send_or_stop")
+
+
+class ChargerSimulator:
+    """
+    Generates the state of a simulated charger: voltage ripple, a
+    current ramp towards the offered current while charging, a
+    temperature that drifts with the load and a monotonic meter.
+    """
+
+    def __init__(self, state, script, max_current=25.0, seed=None):
+        self.state = dict(state)
+        self.script = script
+        self.max_current = max_current
+        self.random = random.Random(seed)
+        self.current = float(self.state["Current"])
+        self.temperature = float(self.state["Temperature"])
+        self.energy = float(self.state["meter_reading"])
+        # Just before zero, so that events at 0 fire on the first step
+        self.script_time = -1e-6
+
+    @property
+    def charging(self):
+        """True when the simulated charger delivers energy."""
+        state = self.state
+        return (
+            state["Gun_connected"] == 1
+            and state["send_or_stop"] == 1
+            and state["Estop"] == 0
+            and state["Powerloss"] == 0
+        )
+
+    def apply_script(self, previous, now):
+        """Apply the scripted events whose time falls in (previous, now]."""
+        loop = self.script.get("loop", 0)
+        for event in self.script["events"]:
+            at = event["at"]
+            if loop:
+                # Time of the latest occurrence of the event up to now
+                at += math.floor((now - at) / loop) * loop
+            if previous < at <= now:
+                self.state.update(event["set"])
+
+    def step(self, elapsed, dt):
+        """Advance the simulation by dt seconds, elapsed seconds after start."""
+        self.apply_script(self.script_time, elapsed)
+        self.script_time = elapsed
+        state = self.state
+
+        if state["Powerloss"] == 1:
+            voltage = 0.0
+        else:
+            voltage = (
+                230.0
+                + 3.0 * math.sin(2 * math.pi * 0.5 * elapsed)
+                + self.random.gauss(0, 0.5)
+            )
+
+        # The current ramps towards the offered current while charging and
+        # drops to zero at once when charging is interrupted.
+        if self.charging:
+            target = min(state["offered_current"], self.max_current)
+            ramp = 2.0 * dt
+            self.current += max(-ramp, min(ramp, target - self.current))
+        else:
+            self.current = 0.0
+
+        power = voltage * self.current
+        self.energy += power * dt / 3600
+
+        # First order drift towards a load dependent temperature
+        ambient = 25.0 + 0.6 * self.current
+        self.temperature += (ambient - self.temperature) * min(1.0, dt / 120)
+
+        state["Voltage"] = round(voltage)
+        state["Current"] = round(self.current)
+        state["Active_Power"] = round(power)
+        state["Frequency"] = 50 if voltage else 0
+        state["Power_factor"] = 1 if self.current > 0 else 0
+        state["Temperature"] = round(self.temperature + self.random.gauss(0, 0.2))
+        state["meter_reading"] = int(self.energy)
+        return state
+
+
+def write_atomic(path, data):
+    """Replace the file in one step so readers see old or new contents."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+    ) as json_fp:
+        json_fp.write(data)
+    os.replace(json_fp.name, path)
+
+
+def write_in_place(path, data):
+    """Truncate and rewrite the file in two flushed halves, leaving a
+    window in which readers observe a partial file.
+    """
+    half = len(data) // 2
+    with open(path, "w", encoding="utf-8") as json_fp:
+        json_fp.write(data[:half])
+        json_fp.flush()
+        json_fp.write(data[half:])
+
+
+def read_gui_fields(path):
+    """Return the GUI controlled fields from the file, or None when the
+    file cannot be decoded.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as json_fp:
+            data = json.load(json_fp)
+    except (OSError, ValueError):
+        return None
+    return {key: data[key] for key in GUI_FIELDS if key in data}
+
+
+def run(arguments, logger):
+    """Write the simulated state to the file until the duration elapses."""
+    path = arguments.source
+    state = dict(DEFAULT_STATE)
+    if Path(path).is_file():
+        try:
+            with open(path, "r", encoding="utf-8") as json_fp:
+                state.update(json.load(json_fp))
+        except ValueError:
+            logger.warning("Ignoring unreadable contents of %s", path)
+    # Stamps of an earlier run are not state: with --no-stamp they would
+    # be written unchanged on every write and taken as current by readers.
+    state.pop("Sequence", None)
+    state.pop("Timestamp", None)
+
+    script = DEFAULT_SCRIPT
+    if arguments.script:
+        with open(arguments.script, "r", encoding="utf-8") as script_fp:
+            script = json.load(script_fp)
+
+    simulator = ChargerSimulator(state, script, seed=arguments.seed)
+    writers = {"atomic": (write_atomic,), "inplace": (write_in_place,)}
+    writers["mixed"] = writers["atomic"] + writers["inplace"]
+    choices = writers[arguments.write_mode]
+
+    period = 1.0 / arguments.rate
+    written = {}
+    writes = 0
+    late = 0
+    max_lateness = 0.0
+    write_time = 0.0
+    start = time.monotonic()
+    deadline = start
+    previous = start
+
+    try:
+        while not arguments.duration or deadline - start < arguments.duration:
+            now = time.monotonic()
+            if now < deadline:
+                time.sleep(deadline - now)
+                now = time.monotonic()
+            elif now - deadline > period:
+                late += 1
+                max_lateness = max(max_lateness, now - deadline)
+
+            if arguments.gui_writes == "honour" and written:
+                on_disk = read_gui_fields(path)
+                if on_disk:
+                    for key, value in on_disk.items():
+                        if value != written.get(key):
+                            logger.info("Honouring GUI write %s=%s", key, value)
+                            simulator.state[key] = value
+
+            data = simulator.step(now - start, now - previous)
+            written = {key: data[key] for key in GUI_FIELDS}
+            begin = time.perf_counter()
+            if arguments.stamp:
+                data = dict(data, Sequence=writes, Timestamp=time.time())
+            simulator.random.choice(choices)(path, json.dumps(data, indent=4) + "\n")
+            write_time += time.perf_counter() - begin
+            writes += 1
+            previous = now
+            deadline += period
+    except KeyboardInterrupt:
+        pass
+
+    elapsed = time.monotonic() - start
+    logger.info(
+        "%d writes in %.1f s (%.1f Hz, target %.1f Hz), mean write %.3f ms, "
+        "%d late writes, max lateness %.1f ms",
+        writes,
+        elapsed,
+        writes / elapsed if elapsed else 0,
+        arguments.rate,
+        write_time / writes * 1000 if writes else 0,
+        late,
+        max_lateness * 1000,
+    )
+
+
+def main():
+    """Parse the command line and run the producer."""
+    arg_parser = argparse.ArgumentParser(
+        prog="Status Producer",
+        description="Synthetic EV charger producer writing the json file \
+                     monitored by the Status Monitor",
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--source",
+        default="./memory.json",
+        help="Path to the json file to write",
+    )
+    arg_parser.add_argument(
+        "-R",
+        "--rate",
+        default=10.0,
+        type=float,
+        help="Writes per second, between 1 and 1000",
+    )
+    arg_parser.add_argument(
+        "-d",
+        "--duration",
+        default=0,
+        type=float,
+        help="Seconds to run for, 0 runs until interrupted",
+    )
+    arg_parser.add_argument(
+        "--script",
+        help="Json file with scripted events: "
+        '{"loop": seconds, "events": [{"at": seconds, "set": {...}}]}',
+    )
+    arg_parser.add_argument(
+        "--gui-writes",
+        default="honour",
+        choices=("honour", "ignore"),
+        help="Adopt or overwrite changes the GUI makes to Estop and send_or_stop",
+    )
+    arg_parser.add_argument(
+        "--write-mode",
+        default="atomic",
+        choices=("atomic", "inplace", "mixed"),
+        help="Replace the file atomically, rewrite it in place (torn reads "
+        "possible) or pick one at random for every write",
+    )
+    arg_parser.add_argument(
+        "--no-stamp",
+        dest="stamp",
+        action="store_false",
+        help="Do not add the Sequence and Timestamp fields to every write",
+    )
+    arg_parser.add_argument("--seed", type=int, help="Seed for the noise generator")
+    arg_parser.add_argument(
+        "-L",
+        "--loglevel",
+        default="INFO",
+        help="Specify the verbosity of logs: debug, info, warn, error, critical",
+    )
+    arguments = arg_parser.parse_args()
+
+    logger = logging.getLogger(__name__)
+    logging.basicConfig(
+        encoding="utf-8", format="[%(levelname)s][%(funcName)s() ] %(message)s"
+    )
+    loglevel = arguments.loglevel
+    if loglevel.strip().upper() in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
+        logging.getLogger().setLevel(loglevel.strip().upper())
+    else:
+        logger.error("Unknown value %s passed for logging level", loglevel)
+        sys.exit(1)
+
+    if not 1 <= arguments.rate <= 1000:
+        logger.error("Rate %s is outside of 1 to 1000 Hz", arguments.rate)
+        sys.exit(1)
+
+    run(arguments, logger)
+
+
+if __name__ == "__main__":
+    main()
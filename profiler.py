@@ -0,0 +1,163 @@
+"""
+A sampling profiler that can be started from within the running
+application. A background thread periodically captures the stack of
+the GUI thread, so the main loop is never instrumented and the
+overhead is limited to the sampling interval. Results are written as
+a collapsed stack file, usable with flamegraph.pl or speedscope, and
+a plain text summary.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Source files whose functions are used to attribute samples
+ATTRIBUTED_FILES = ("dash.py", "editable_label.py")
+
+# Functions for which the inclusive share of samples is reported
+HOT_PATHS = ("update_callback", "update_from_file", "on_save")
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a target thread, the GUI thread by default,
+    for a fixed duration and writes the results to output_dir.
+    """
+
+    def __init__(self, output_dir=".", interval=0.005, top=20, thread_id=None):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top = top
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.worker = None
+
+    @property
+    def running(self):
+        """True while a capture is in progress."""
+        return self.worker is not None and self.worker.is_alive()
+
+    def start(self, seconds):
+        """Start a capture of the given duration. Returns False if a
+        capture is already in progress.
+        """
+        if self.running:
+            self.logger.warning("Profiler capture already in progress.")
+            return False
+        self.worker = threading.Thread(
+            target=self._capture, args=(seconds,), name="profiler", daemon=True
+        )
+        self.worker.start()
+        self.logger.info("Profiler capture started for %s seconds.", seconds)
+        return True
+
+    def _capture(self, seconds):
+        # The sampler needs the GIL, so it waits while the profiled thread
+        # runs Python code and samples freely while the toolkit idles with
+        # the GIL released. Each stack is therefore weighted by the time
+        # since the previous sample, and the switch interval is shortened
+        # for the capture so that a wait ends before the profiled code does.
+        stacks = Counter()
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, self.interval / 10))
+        try:
+            deadline = time.monotonic() + seconds
+            previous = time.perf_counter()
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(self.thread_id)
+                now = time.perf_counter()
+                if frame is None:
+                    self.logger.error("Profiled thread is no longer running.")
+                    break
+                stacks[_walk(frame)] += now - previous
+                previous = now
+                del frame
+                time.sleep(self.interval)
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        try:
+            self._write(stacks, seconds)
+        except OSError as error:
+            self.logger.error("Failed to write profiler output: %s", error)
+
+    def _write(self, stacks, seconds):
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        stamp += f"-{int(now * 1000) % 1000:03d}"
+        base = os.path.join(self.output_dir, f"profile-{stamp}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Collapsed stack counts are integers, written in microseconds
+        with open(base + ".folded", "w", encoding="utf-8") as folded_fp:
+            for stack, weight in stacks.most_common():
+                folded_fp.write(f"{';'.join(stack)} {round(weight * 1e6)}\n")
+
+        with open(base + ".txt", "w", encoding="utf-8") as summary_fp:
+            summary_fp.write(summarize(stacks, seconds, self.top))
+
+        self.logger.info("Profiler output written to %s.folded and .txt", base)
+
+
+def summarize(stacks, seconds, top=20):
+    """Return a text summary of collapsed stacks weighted by sampled
+    time in seconds: time attributed to application callbacks,
+    inclusive share of the hot paths and the top functions by self time.
+    """
+    total = sum(stacks.values())
+    attributed = Counter()
+    inclusive = Counter()
+    leaves = Counter()
+    for stack, weight in stacks.items():
+        attributed[_attribute(stack)] += weight
+        functions = {frame.rsplit(":", 1)[-1].rsplit(".", 1)[-1] for frame in stack}
+        for name in HOT_PATHS:
+            if name in functions:
+                inclusive[name] += weight
+        if stack:
+            leaves[stack[-1]] += weight
+
+    lines = [f"Sampled {total:.3f} s over {seconds} s", ""]
+    lines.append("By callback:")
+    lines.extend(_table(attributed.most_common(), total))
+    lines.append("")
+    lines.append("Hot paths (inclusive):")
+    lines.extend(_table([(name, inclusive[name]) for name in HOT_PATHS], total))
+    lines.append("")
+    lines.append(f"Top {top} functions (self):")
+    lines.extend(_table(leaves.most_common(top), total))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _walk(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        stack.append(f"{os.path.basename(code.co_filename)}:{name}")
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _attribute(stack):
+    """Name the outermost application frame of a stack. Samples with
+    none are the toolkit waiting for events.
+    """
+    for frame in stack:
+        if frame.split(":", 1)[0] in ATTRIBUTED_FILES:
+            return frame
+    return "(idle / toolkit)"
+
+
+def _table(rows, total):
+    if not total:
+        return ["  (no samples)"]
+    return [
+        f"  {weight * 1000:>9.1f} ms {weight / total:>7.1%}  {name}"
+        for name, weight in rows
+    ]
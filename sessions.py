@@ -0,0 +1,238 @@
+"""
+Charging session detection and storage. The detector is a state
+machine fed with every decoded state of the json file, and completed
+sessions are kept in an SQLite database indexed by start time and
+ID tag, so that queries do not need the raw state history.
+
+Run as a script to query the stored sessions.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import time
+
+
+class SessionDetector:
+    """
+    Incremental charging session detector. A session starts when the
+    gun is connected and charging is authorized, and ends when it is
+    de-authorized, emergency stopped or the gun is disconnected.
+
+    States: idle (no gun), connected (gun, not charging), charging and
+    halted. An emergency stop while authorized, whether or not a session
+    is open, leads to halted: releasing the stop or unplugging and
+    replugging the gun does not start a session, charging has to be
+    de-authorized and authorized again.
+
+    A session found already charging on the first state fed started
+    before the detector ran. Its start_reason is "resumed" instead of
+    "authorized", as its start time and meter are those of the first read.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.state = "idle"
+        self.session = None
+        # Set by an emergency stop while authorized, until de-authorized
+        self.needs_authorization = False
+        self.started = False
+
+    def feed(self, data, timestamp):
+        """Advance the state machine with the decoded json contents read
+        at timestamp (seconds since the epoch). Returns the completed
+        session as a dict when one ends, otherwise None.
+        """
+        connected = data.get("Gun_connected") == 1
+        authorized = data.get("send_or_stop") == 1
+        stopped = data.get("Estop") == 1
+        completed = None
+
+        if self.state == "charging":
+            self.session["end_meter"] = data.get("meter_reading", 0)
+            self.session["peak_current"] = max(
+                self.session["peak_current"], data.get("Current", 0)
+            )
+            if not connected:
+                completed = self.close(timestamp, "disconnected")
+            elif stopped:
+                completed = self.close(timestamp, "estop")
+            elif not authorized:
+                completed = self.close(timestamp, "stopped")
+
+        if authorized and stopped:
+            self.needs_authorization = True
+        elif not authorized:
+            self.needs_authorization = False
+
+        if not connected:
+            self.state = "idle"
+        elif self.state == "charging":
+            pass
+        elif self.needs_authorization:
+            self.state = "halted"
+        elif authorized:
+            self.open(data, timestamp, "authorized" if self.started else "resumed")
+        else:
+            self.state = "connected"
+        self.started = True
+        return completed
+
+    def open(self, data, timestamp, reason="authorized"):
+        """Start a session from the decoded json contents."""
+        meter = data.get("meter_reading", 0)
+        self.session = {
+            "started_at": timestamp,
+            "start_reason": reason,
+            "idtag": data.get("Idtag", ""),
+            "reservation_id": data.get("Reservation_id", 0),
+            "start_meter": meter,
+            "end_meter": meter,
+            "peak_current": data.get("Current", 0),
+        }
+        self.state = "charging"
+        self.logger.info("Charging session started for %s.", self.session["idtag"])
+
+    def close(self, timestamp, reason):
+        """End the open session, if any, and return it."""
+        if self.session is None:
+            return None
+        session = self.session
+        self.session = None
+        self.state = "connected"
+        session["ended_at"] = timestamp
+        session["end_reason"] = reason
+        # A meter reset during the session is not counted as negative energy
+        session["energy"] = max(0, session["end_meter"] - session["start_meter"])
+        self.logger.info(
+            "Charging session ended for %s (%s), energy %s.",
+            session["idtag"],
+            reason,
+            session["energy"],
+        )
+        return session
+
+
+class SessionStore:
+    """
+    SQLite backed store of completed charging sessions, indexed by
+    start time and by ID tag and start time.
+    """
+
+    COLUMNS = (
+        "started_at",
+        "ended_at",
+        "idtag",
+        "reservation_id",
+        "start_meter",
+        "end_meter",
+        "energy",
+        "peak_current",
+        "start_reason",
+        "end_reason",
+    )
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS sessions (
+                    id INTEGER PRIMARY KEY,
+                    started_at REAL NOT NULL,
+                    ended_at REAL NOT NULL,
+                    idtag TEXT NOT NULL,
+                    reservation_id INTEGER,
+                    start_meter REAL,
+                    end_meter REAL,
+                    energy REAL,
+                    peak_current REAL,
+                    start_reason TEXT,
+                    end_reason TEXT
+                )"""
+            )
+            columns = {
+                row["name"]
+                for row in self.connection.execute("PRAGMA table_info(sessions)")
+            }
+            if "start_reason" not in columns:
+                # Databases written before start reasons were recorded
+                self.connection.execute(
+                    "ALTER TABLE sessions ADD COLUMN start_reason TEXT"
+                )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_started_at "
+                "ON sessions (started_at)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_idtag_started_at "
+                "ON sessions (idtag, started_at)"
+            )
+
+    def add(self, session):
+        """Persist a completed session dict."""
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO sessions ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [session[column] for column in self.COLUMNS],
+            )
+
+    def query(self, idtag=None, since=None, until=None, limit=None):
+        """Return the sessions, newest first, optionally restricted to an
+        ID tag and to a start time range (seconds since the epoch).
+        """
+        conditions = []
+        parameters = []
+        if idtag is not None:
+            conditions.append("idtag = ?")
+            parameters.append(idtag)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("started_at < ?")
+            parameters.append(until)
+        statement = "SELECT * FROM sessions"
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+        statement += " ORDER BY started_at DESC"
+        if limit is not None:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+        return [dict(row) for row in self.connection.execute(statement, parameters)]
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+
+def main():
+    """Print the stored sessions matching the command line as json lines."""
+    arg_parser = argparse.ArgumentParser(
+        prog="Session Query",
+        description="Query the charging sessions recorded by the Status Monitor",
+    )
+    arg_parser.add_argument(
+        "database", nargs="?", default="./sessions.db", help="Session database"
+    )
+    arg_parser.add_argument("-t", "--tag", help="Only sessions for this ID tag")
+    arg_parser.add_argument(
+        "-d", "--days", type=float, help="Only sessions started in the last N days"
+    )
+    arg_parser.add_argument("-n", "--limit", type=int, help="Maximum sessions")
+    arguments = arg_parser.parse_args()
+
+    since = None
+    if arguments.days is not None:
+        since = time.time() - arguments.days * 86400
+
+    store = SessionStore(arguments.database)
+    for session in store.query(arguments.tag, since, limit=arguments.limit):
+        print(json.dumps(session))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Streaming statistics for the values decoded from the monitored
+json file. Every estimator here does a constant amount of work per
+sample and holds a constant amount of state, so the memory used
+does not grow with the uptime of the application.
+"""
+
+import math
+
+
+class P2Quantile:
+    """
+    Approximate quantile estimator using the P-square algorithm
+    (Jain & Chlamtac, 1985). Five markers are kept regardless of
+    how many samples are observed.
+    """
+
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [
+            1,
+            1 + 2 * quantile,
+            1 + 4 * quantile,
+            3 + 2 * quantile,
+            5,
+        ]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, sample):
+        """Feed a sample to the estimator."""
+        if len(self.heights) < 5:
+            self.heights.append(sample)
+            self.heights.sort()
+            return
+
+        heights = self.heights
+        if sample < heights[0]:
+            heights[0] = sample
+            cell = 0
+        elif sample >= heights[4]:
+            heights[4] = sample
+            cell = 3
+        else:
+            cell = 0
+            while sample >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the three middle markers if they drifted from their
+        # desired positions.
+        for i in range(1, 4):
+            delta = self.desired[i] - self.positions[i]
+            if (delta >= 1 and self.positions[i + 1] - self.positions[i] > 1) or (
+                delta <= -1 and self.positions[i - 1] - self.positions[i] < -1
+            ):
+                step = 1 if delta > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = self._linear(i, step)
+                heights[i] = candidate
+                self.positions[i] += step
+
+    def _parabolic(self, i, step):
+        heights = self.heights
+        positions = self.positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step)
+            * (heights[i + 1] - heights[i])
+            / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step)
+            * (heights[i] - heights[i - 1])
+            / (positions[i] - positions[i - 1])
+        )
+
+    def _linear(self, i, step):
+        heights = self.heights
+        positions = self.positions
+        return heights[i] + step * (heights[i + step] - heights[i]) / (
+            positions[i + step] - positions[i]
+        )
+
+    def value(self):
+        """Return the current estimate, or None if no samples were seen."""
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            # Too few samples for the markers, use the exact order statistic.
+            index = round(self.quantile * (len(self.heights) - 1))
+            return self.heights[index]
+        return self.heights[2]
+
+
+class MetricStats:
+    """
+    Running statistics for a single numeric field: EWMA, session
+    minimum and maximum, and approximate p50/p95.
+    """
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.count = 0
+        self.ewma = None
+        self.minimum = None
+        self.maximum = None
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+
+    def add(self, sample):
+        """Feed a sample to all the estimators."""
+        self.count += 1
+        if self.ewma is None:
+            self.ewma = sample
+            self.minimum = sample
+            self.maximum = sample
+        else:
+            self.ewma += self.alpha * (sample - self.ewma)
+            self.minimum = min(self.minimum, sample)
+            self.maximum = max(self.maximum, sample)
+        self.p50.add(sample)
+        self.p95.add(sample)
+
+    def snapshot(self):
+        """Return the current statistics as a json friendly dict."""
+        return {
+            "count": self.count,
+            "ewma": _rounded(self.ewma),
+            "min": _rounded(self.minimum),
+            "max": _rounded(self.maximum),
+            "p50": _rounded(self.p50.value()),
+            "p95": _rounded(self.p95.value()),
+        }
+
+
+class RateEstimator:
+    """
+    Derives a rate of change per hour from successive readings of a
+    monotonic counter such as the energy meter. The rate is measured
+    over spans of at least window seconds, so that the resolution of
+    the counter does not dominate, and smoothed with an EWMA whose
+    weight follows the elapsed time (time constant tau seconds) rather
+    than the number of readings. A decrease of the counter is treated
+    as a meter reset and only re-anchors the estimator.
+    """
+
+    def __init__(self, tau=30.0, window=10.0):
+        self.tau = tau
+        self.window = window
+        self.last_reading = None
+        self.last_time = None
+        self.rate = None
+
+    def add(self, reading, timestamp):
+        """Feed a counter reading taken at timestamp (in seconds)."""
+        if self.last_reading is not None and reading >= self.last_reading:
+            elapsed = timestamp - self.last_time
+            if elapsed < self.window:
+                return
+            instant = (reading - self.last_reading) / elapsed * 3600
+            if self.rate is None:
+                self.rate = instant
+            else:
+                alpha = 1 - math.exp(-elapsed / self.tau)
+                self.rate += alpha * (instant - self.rate)
+        self.last_reading = reading
+        self.last_time = timestamp
+
+    def value(self):
+        """Return the smoothed rate per hour, or None before a full window."""
+        return _rounded(self.rate)
+
+
+class StatsEngine:
+    """
+    Keeps a MetricStats for each of the given fields and a charging
+    rate derived from the meter reading.
+    """
+
+    def __init__(self, fields, meter_field="meter_reading", alpha=0.2):
+        self.fields = fields
+        self.meter_field = meter_field
+        self.metrics = {field: MetricStats(alpha) for field in fields}
+        self.charge_rate = RateEstimator()
+
+    def update(self, data, timestamp):
+        """Feed the decoded json contents read at timestamp. Only contents
+        that changed since the previous update should be fed.
+        """
+        for field, metric in self.metrics.items():
+            sample = data.get(field)
+            if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+                if math.isfinite(sample):
+                    metric.add(sample)
+
+        reading = data.get(self.meter_field)
+        if isinstance(reading, (int, float)) and not isinstance(reading, bool):
+            self.charge_rate.add(reading, timestamp)
+
+    def snapshot(self):
+        """Return all statistics as a json friendly dict."""
+        data = {field: metric.snapshot() for field, metric in self.metrics.items()}
+        data["charge_rate_per_hour"] = self.charge_rate.value()
+        return data
+
+
+def _rounded(value, digits=3):
+    if value is None:
+        return None
+    return round(value, digits)
@@ -0,0 +1,152 @@
+"""
+Tests of the charging session state machine and store.
+Run with: python -m unittest test_sessions
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sessions import SessionDetector, SessionStore
+
+
+def state(connected=1, authorized=0, stopped=0, meter=0):
+    """Decoded json contents with the fields the detector reads."""
+    return {
+        "Gun_connected": connected,
+        "send_or_stop": authorized,
+        "Estop": stopped,
+        "meter_reading": meter,
+        "Current": 0,
+        "Idtag": "TAG",
+        "Reservation_id": 0,
+    }
+
+
+class SessionDetectorTest(unittest.TestCase):
+    def feed(self, detector, *states):
+        """Feed states one second apart, return the completed sessions."""
+        completed = []
+        for timestamp, data in enumerate(states, start=1):
+            session = detector.feed(data, timestamp)
+            if session is not None:
+                completed.append(session)
+        return completed
+
+    def test_session(self):
+        detector = SessionDetector()
+        completed = self.feed(
+            detector,
+            state(connected=0),
+            state(),
+            state(authorized=1, meter=10),
+            state(authorized=1, meter=25),
+            state(authorized=0, meter=30),
+        )
+        self.assertEqual(len(completed), 1)
+        session = completed[0]
+        self.assertEqual(session["start_reason"], "authorized")
+        self.assertEqual(session["end_reason"], "stopped")
+        self.assertEqual(session["energy"], 20)
+        self.assertEqual((session["started_at"], session["ended_at"]), (3, 5))
+
+    def test_estop_release_needs_authorization(self):
+        detector = SessionDetector()
+        completed = self.feed(
+            detector,
+            state(connected=0),
+            state(authorized=1),
+            state(authorized=1, stopped=1),
+            state(authorized=1),
+        )
+        self.assertEqual([s["end_reason"] for s in completed], ["estop"])
+        self.assertEqual(detector.state, "halted")
+        self.assertIsNone(detector.session)
+
+        self.feed(detector, state(), state(authorized=1))
+        self.assertEqual(detector.state, "charging")
+
+    def test_estop_without_session_needs_authorization(self):
+        detector = SessionDetector()
+        self.feed(
+            detector,
+            state(connected=0),
+            state(connected=0, authorized=1, stopped=1),
+            state(authorized=1),
+        )
+        self.assertEqual(detector.state, "halted")
+
+    def test_replug_after_estop_needs_authorization(self):
+        detector = SessionDetector()
+        self.feed(
+            detector,
+            state(connected=0),
+            state(authorized=1),
+            state(authorized=1, stopped=1),
+            state(authorized=1),
+            state(connected=0, authorized=1),
+            state(authorized=1),
+        )
+        self.assertEqual(detector.state, "halted")
+        self.assertIsNone(detector.session)
+
+        self.feed(detector, state(connected=0), state(), state(authorized=1))
+        self.assertEqual(detector.state, "charging")
+
+    def test_session_running_at_startup_is_resumed(self):
+        detector = SessionDetector()
+        completed = self.feed(
+            detector,
+            state(authorized=1, meter=50),
+            state(connected=0, meter=60),
+            state(),
+            state(authorized=1, meter=60),
+            state(connected=0, authorized=1, meter=70),
+        )
+        self.assertEqual(
+            [(s["start_reason"], s["end_reason"]) for s in completed],
+            [("resumed", "disconnected"), ("authorized", "disconnected")],
+        )
+
+
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "sessions.db")
+
+    def test_add_and_query(self):
+        detector = SessionDetector()
+        detector.feed(state(authorized=1, meter=5), 100.0)
+        session = detector.close(160.0, "shutdown")
+        store = SessionStore(self.path)
+        self.addCleanup(store.close)
+        store.add(session)
+        (row,) = store.query(idtag="TAG", since=50.0)
+        self.assertEqual(row["start_reason"], "resumed")
+        self.assertEqual(row["end_reason"], "shutdown")
+        self.assertEqual(store.query(idtag="OTHER"), [])
+
+    def test_database_without_start_reason(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE sessions (id INTEGER PRIMARY KEY, started_at REAL NOT "
+            "NULL, ended_at REAL NOT NULL, idtag TEXT NOT NULL, reservation_id "
+            "INTEGER, start_meter REAL, end_meter REAL, energy REAL, "
+            "peak_current REAL, end_reason TEXT)"
+        )
+        connection.close()
+        store = SessionStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(store.query(), [])
+        self.assertIn("start_reason", store.COLUMNS)
+        columns = [
+            row["name"]
+            for row in store.connection.execute("PRAGMA table_info(sessions)")
+        ]
+        self.assertIn("start_reason", columns)
+
+
+if __name__ == "__main__":
+    unittest.main()